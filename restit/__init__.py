@@ -13,33 +13,62 @@
 """
 from __future__ import absolute_import
 
-import inspect
-import itertools
+# The HTTP stack (requests, urllib3 and the .connection module) and the
+# other expensive modules are imported on first use, which keeps
+# `import restit` cheap for short-lived programs.
+import contextlib
+import functools
 import logging
-import re
-import requests
-from requests import ConnectionError
+import os
+import threading
 try:
-    from requests.packages.urllib3.exceptions import SSLError
+    from Queue import LifoQueue, Empty, Full
 except ImportError:
-    from urllib3.exceptions import SSLError
+    from queue import LifoQueue, Empty, Full
 
-from .exceptions import RequestException, BadResponseFormatException
+from .exceptions import RequestException, BadResponseFormatException, \
+                        RateLimitExceededException, \
+                        RequestTimeoutException, DeadlineExceededException
+from .hedging import HedgePolicy, scheduler as hedge_scheduler
+from .ratelimit import TokenBucket
+from .utils import monotonic
 from .validator import ResponseValidator
 
 
 logger = logging.getLogger(__name__)
 
 
+def _cap_timeout(timeout, limit):
+    if limit is None:
+        return timeout
+    if timeout is None:
+        return limit
+    if isinstance(timeout, tuple):
+        return tuple(limit if t is None else min(t, limit) for t in timeout)
+    return min(timeout, limit)
+
+
+def _arg_names(func):
+    import inspect
+
+    # inspect.getargspec is deprecated since Python 3.0 and gone since 3.11
+    getargspec = getattr(inspect, 'getfullargspec', None) or \
+        getattr(inspect, 'getargspec')
+    return getargspec(func).args
+
+
 class _Request(object):
-    def __init__(self, method, path, path_params, rest_client, resp_structure):
+    def __init__(self, method, path, path_params, rest_client, resp_structure,
+                 **settings):
         self.method = method
         self.path = path
         self.path_params = path_params
         self.rest_client = rest_client
         self.resp_structure = resp_structure
+        self.settings = settings
 
     def _gen_path(self):
+        import re
         new_path = self.path
         matches = re.finditer(r'\{(\w+?)\}', self.path)
         for match in matches:
@@ -69,22 +98,415 @@ class _Request(object):
                                     .format(method.upper()))
                 data = req_data
         resp = self.rest_client.do_request(method, self._gen_path(), params,
-                                           data, raw_content)
+                                           data, raw_content, **self.settings)
         if raw_content and self.resp_structure:
             raise Exception("Cannot validate reponse in raw format")
         ResponseValidator.validate(self.resp_structure, resp)
         return resp
 
 
-class RestClient(object):
-    def __init__(self, host, port, client_name=None, ssl=False, auth=None):
+def _is_success(resp):
+    return resp is not None and resp.ok
+
+
+class _HedgeRace(object):
+    """Race between a request sent from the calling thread and its hedge
+    The first successful response wins, and the request that is still
+    pending is aborted through its ConnectionAborter. A failed request, be it
+    an error response or an exception, waits for the other one instead, and
+    is only reported if both fail.
+    """
+
+    def __init__(self, aborter_cls):
+        self.primary = aborter_cls()
+        self.hedge = None
+        self._aborter_cls = aborter_cls
+        self._outcome = None
+        self._result = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start_hedge(self, reserve):
+        """Returns the aborter of the hedge, or None if the race is over
+        `reserve` is called while the race is known to be running, and can
+        veto the hedge by returning False.
+        """
+        with self._lock:
+            if self._outcome is not None or not reserve():
+                return None
+            self.hedge = self._aborter_cls()
+            return self.hedge
+
+    def hedge_done(self, resp, ex):
+        with self._lock:
+            self._result = (resp, ex)
+            if _is_success(resp) and self._outcome is None:
+                self.primary.abort()
+            discard = resp is not None and self._outcome == 'won'
+        self._done.set()
+        if discard:
+            resp.close()
+
+    def primary_done(self, resp, ex):
+        """Returns the winning response, or reports the failure of the
+        request sent from the calling thread if the hedge failed too
+        """
+        won = _is_success(resp)
+        with self._lock:
+            self._outcome = 'won' if won else 'lost'
+            hedge, result = self.hedge, self._result
+        if won:
+            if result is None:
+                if hedge is not None:
+                    hedge.abort()
+                return resp
+            if _is_success(result[0]):
+                # the hedge was answered first, but the request could not
+                # be aborted in time
+                resp.close()
+                return result[0]
+            if result[0] is not None:
+                result[0].close()
+            return resp
+        if hedge is not None:
+            self._done.wait()
+            hedge_resp = self._result[0]
+            if _is_success(hedge_resp):
+                if resp is not None:
+                    resp.close()
+                return hedge_resp
+            if hedge_resp is not None:
+                hedge_resp.close()
+        if ex is not None:
+            raise ex
+        return resp
+
+
+class RestClient(object):  # pylint: disable=R0902
+    """Base class of REST API clients
+    `rate_limit` sets the maximum number of requests per second sent by this
+    client, with bursts of up to `rate_limit_burst` requests. Requests that
+    exceed the limit, or that are answered with a 429 status code, block until
+    the server allows new requests, for at most `rate_limit_timeout` seconds.
+    See `TokenBucket` for how the limit adapts to the server's rate limiting
+    headers.
+    Endpoints can be rate limited on their own by passing the `rate_limit`
+    and `rate_limit_burst` arguments to the `api_*` decorators.
+    `timeout` is the connect and read timeout of each HTTP request, either as
+    a number of seconds or as a (connect, read) tuple, like in `requests`.
+    `deadline` is the overall time budget, in seconds, of an API call. It
+    covers the login round-trips and the retries made on behalf of the call,
+    which fails with DeadlineExceededException once the budget is spent.
+    Both can be overridden per endpoint through the `timeout` and `deadline`
+    arguments of the `api_*` decorators.
+    GET endpoints can be hedged by passing `hedge=True` to `api_get`: a
+    second request is sent if the first one is not answered within
+    `hedge_delay` seconds, or within the p95 latency of the endpoint if no
+    delay is given, and the first response wins, the other request being
+    aborted. At most `hedge_max_ratio` of the requests of an endpoint are
+    hedged. See `HedgePolicy`.
+    `session_strategy` selects how `requests.Session` objects, which are not
+    thread-safe, are shared between threads:
+      * 'shared': a single session is used by all threads.
+      * 'thread': each thread uses its own session. Hedged requests use
+        sessions from a pool like the one of the 'pool' strategy.
+      * 'pool': each request checks out a session from a pool that keeps up
+        to `session_pool_size` idle sessions, and creates a new one if the
+        pool is empty.
+    Sessions are created by `_new_session`, which subclasses can override to
+    configure them. A client that is inherited by a forked process rebuilds
+    its sessions, so that the connections of the parent process are never
+    reused by the child.
+    Each session keeps up to `pool_maxsize` connections to the service, see
+    `warmup` and `start_keepalive` to open them ahead of the first requests.
+    `dns_cache_ttl` enables an in-process cache of the resolution of the
+    service host name, and `tls_session_reuse` the resumption of TLS sessions
+    by new connections, which skips most of the TLS handshake. Both are
+    shared by all the sessions of the client.
+    """
+
+    SESSION_STRATEGIES = ('shared', 'thread', 'pool')
+
+    def __init__(self, host, port, client_name=None, ssl=False, auth=None,
+                 rate_limit=None, rate_limit_burst=None,
+                 rate_limit_timeout=None, timeout=None, deadline=None,
+                 hedge_max_ratio=0.1, session_strategy='shared',
+                 session_pool_size=10, pool_maxsize=None,
+                 dns_cache_ttl=None, tls_session_reuse=False):
+        # the arguments alone exceed the local variables limit
+        # pylint: disable=R0914
         super(RestClient, self).__init__()
         self.client_name = client_name if client_name else ''
         self.base_url = 'http{}://{}:{}'.format('s' if ssl else '', host, port)
         logger.debug("REST service base URL: %s", self.base_url)
         self.headers = {'Accept': 'application/json'}
         self.auth = auth
-        self.session = requests.Session()
+        if session_strategy not in self.SESSION_STRATEGIES:
+            raise ValueError("Invalid session strategy: {}"
+                             .format(session_strategy))
+        self.session_strategy = session_strategy
+        self.session_pool_size = session_pool_size
+        self._init_connections(pool_maxsize, dns_cache_ttl, tls_session_reuse)
+        self._fork_lock = threading.Lock()
+        self._keepalive = None
+        self._reset_sessions()
+        self.rate_limiter = TokenBucket(rate_limit, rate_limit_burst) \
+            if rate_limit else None
+        self.rate_limit_timeout = rate_limit_timeout
+        self._endpoint_rate_limiters = {}
+        self.timeout = timeout
+        self.deadline = deadline
+        self._local = threading.local()
+        self.hedge_max_ratio = hedge_max_ratio
+        self._endpoint_hedge_policies = {}
+
+    def _init_connections(self, pool_maxsize, dns_cache_ttl,
+                          tls_session_reuse):
+        from requests.adapters import DEFAULT_POOLSIZE
+        from .connection import DNSCache, TLSSessionContext, \
+            TLS_SESSION_REUSE_SUPPORTED
+
+        self.pool_maxsize = pool_maxsize if pool_maxsize else DEFAULT_POOLSIZE
+        self.dns_cache = DNSCache(dns_cache_ttl) \
+            if dns_cache_ttl is not None else None
+        if tls_session_reuse and not TLS_SESSION_REUSE_SUPPORTED:
+            logger.warning("%s TLS session reuse is not supported by this "
+                           "Python version", self.client_name)
+            tls_session_reuse = False
+        self.tls_context = TLSSessionContext() if tls_session_reuse else None
+
+    def _new_session(self):
+        import requests
+        from .connection import WarmPoolAdapter
+
+        session = requests.Session()
+        for prefix in ['http://', 'https://']:
+            session.mount(prefix, WarmPoolAdapter(
+                self.dns_cache, self.tls_context,
+                pool_maxsize=self.pool_maxsize))
+        return session
+
+    def _connection_pool(self, session):
+        import requests
+
+        # the pool is looked up with the same settings as the requests sent
+        # by the session, which can be overridden by environment variables
+        settings = session.merge_environment_settings(self.base_url, {}, None,
+                                                      None, None)
+        adapter = session.get_adapter(self.base_url)
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            request = requests.Request('GET', self.base_url).prepare()
+            return adapter.get_connection_with_tls_context(
+                request, settings['verify'], settings['proxies'],
+                settings['cert'])
+        return adapter.get_connection(self.base_url, settings['proxies'])
+
+    def warmup(self, n_connections=1, ping_path='/'):
+        """Opens connections to the REST service ahead of the requests
+        Makes sure that `n_connections` connections, up to `pool_maxsize`,
+        are open in the connection pool of the session of the calling thread,
+        or of a session of the pool with the 'pool' session strategy.
+        Each connection is then sent a HEAD request to `ping_path`, unless it
+        is None, which keeps the server from closing idle connections and
+        completes the TLS 1.3 handshake, whose pending session tickets would
+        otherwise make the connection look dropped to urllib3.
+        Returns the number of open connections.
+        """
+        import socket
+        try:
+            from http.client import HTTPException
+        except ImportError:
+            from httplib import HTTPException
+        try:
+            from requests.packages.urllib3.exceptions import HTTPError
+        except ImportError:
+            from urllib3.exceptions import HTTPError
+
+        n_connections = min(n_connections, self.pool_maxsize)
+        connect_timeout = self.timeout[0] \
+            if isinstance(self.timeout, tuple) else self.timeout
+        with self._checkout_session() as session:
+            pool = self._connection_pool(session)
+            conns = []
+            opened = 0
+            try:
+                for _ in range(n_connections):
+                    conn = pool._get_conn()  # pylint: disable=W0212
+                    conns.append(conn)
+                    try:
+                        if conn.sock is None:
+                            conn.timeout = connect_timeout
+                            conn.connect()
+                        if ping_path is not None:
+                            conn.request('HEAD', ping_path,
+                                         headers=self.headers)
+                            conn.getresponse().read()
+                    # ValueError covers the host name mismatches of the
+                    # server certificate
+                    except (socket.error, ValueError, HTTPError,
+                            HTTPException) as ex:
+                        logger.warning("%s REST API warmup failed: %s",
+                                       self.client_name, ex)
+                        conn.close()
+                        break
+                    opened += 1
+            finally:
+                for conn in conns:
+                    pool._put_conn(conn)  # pylint: disable=W0212
+        logger.debug("%s REST API warmup: %s open connections",
+                     self.client_name, opened)
+        return opened
+
+    def start_keepalive(self, interval, n_connections=1, ping_path='/'):
+        """Keeps the connection pool warm from a background thread
+        Calls `warmup` every `interval` seconds, which pings the open
+        connections and reopens the ones closed by the server.
+        Not supported with the 'thread' session strategy, as the sessions of
+        the other threads cannot be reached.
+        """
+        if self.session_strategy == 'thread':
+            raise Exception("Keep-alive is not supported with the thread "
+                            "session strategy")
+        self.stop_keepalive()
+        self._keepalive = (interval, n_connections, ping_path)
+        stop = self._keepalive_stop = threading.Event()
+
+        def keepalive():
+            while not stop.wait(interval):
+                try:
+                    self.warmup(n_connections, ping_path)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("%s REST API keep-alive failed",
+                                     self.client_name)
+
+        thread = threading.Thread(target=keepalive)
+        thread.daemon = True
+        thread.start()
+
+    def stop_keepalive(self):
+        self._keepalive = None
+        if self._keepalive_stop is not None:
+            self._keepalive_stop.set()
+            self._keepalive_stop = None
+
+    def _reset_sessions(self):
+        # sessions inherited from a parent process are dropped without being
+        # closed, as their sockets are still in use by the parent
+        self._shared_session = self._new_session() \
+            if self.session_strategy == 'shared' else None
+        self._thread_sessions = threading.local()
+        self._session_pool = LifoQueue(self.session_pool_size)
+        # the keep-alive thread does not survive a fork either
+        self._keepalive_stop = None
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        if self._pid == os.getpid():
+            return
+        with self._fork_lock:
+            if self._pid == os.getpid():
+                return
+            logger.debug("%s REST client used by forked process %s, "
+                         "rebuilding sessions", self.client_name,
+                         os.getpid())
+            self._reset_sessions()
+            if self._keepalive is not None:
+                self.start_keepalive(*self._keepalive)
+
+    @property
+    def session(self):
+        """Session of the calling thread
+        Not available with the 'pool' session strategy.
+        """
+        self._check_fork()
+        if self.session_strategy == 'pool':
+            raise Exception("No session available with the pool session "
+                            "strategy")
+        if self.session_strategy == 'thread':
+            session = getattr(self._thread_sessions, 'session', None)
+            if session is None:
+                session = self._new_session()
+                self._thread_sessions.session = session
+            return session
+        return self._shared_session
+
+    @session.setter
+    def session(self, session):
+        self._check_fork()
+        if self.session_strategy == 'pool':
+            raise Exception("No session available with the pool session "
+                            "strategy")
+        if self.session_strategy == 'thread':
+            self._thread_sessions.session = session
+        else:
+            self._shared_session = session
+
+    @contextlib.contextmanager
+    def _checkout_session(self, pooled=False):
+        if self.session_strategy != 'pool' and not pooled:
+            yield self.session
+            return
+        self._check_fork()
+        try:
+            session = self._session_pool.get_nowait()
+        except Empty:
+            session = self._new_session()
+        try:
+            yield session
+        finally:
+            try:
+                self._session_pool.put_nowait(session)
+            except Full:
+                session.close()
+
+    def _endpoint_rate_limiter(self, method, path, rate_limit,
+                               rate_limit_burst=None):
+        key = (method, path)
+        limiter = self._endpoint_rate_limiters.get(key)
+        if limiter is None:
+            limiter = self._endpoint_rate_limiters.setdefault(
+                key, TokenBucket(rate_limit, rate_limit_burst))
+        return limiter
+
+    def _endpoint_hedge_policy(self, method, path, hedge_delay=None):
+        key = (method, path)
+        policy = self._endpoint_hedge_policies.get(key)
+        if policy is None:
+            policy = self._endpoint_hedge_policies.setdefault(
+                key, HedgePolicy(hedge_delay,
+                                 max_ratio=self.hedge_max_ratio))
+        return policy
+
+    def _active_deadline(self):
+        return getattr(self._local, 'deadline', None)
+
+    @contextlib.contextmanager
+    def _deadline_scope(self, budget):
+        """Sets the deadline of the API calls made within the scope
+        Nested scopes, like the login requests made on behalf of an API call,
+        never extend the deadline of the enclosing scope.
+        """
+        outer = self._active_deadline()
+        deadline = outer
+        if budget is not None:
+            deadline = monotonic() + budget
+            if outer is not None:
+                deadline = min(deadline, outer)
+        self._local.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self._local.deadline = outer
+
+    def _remaining_time(self, deadline):
+        if deadline is None:
+            return None
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            logger.error("%s REST API deadline exceeded", self.client_name)
+            raise DeadlineExceededException("{} REST API deadline exceeded"
+                                            .format(self.client_name))
+        return remaining
 
     def _login(self, request=None):
         pass
@@ -101,8 +523,10 @@ class RestClient(object):
     @classmethod
     def requires_login(cls, func):
         def func_wrapper(self, *args, **kwargs):
+            # pylint: disable=W0212
             retries = 2
             while True:
+                self._remaining_time(self._active_deadline())
                 try:
                     if not self.is_logged_in():
                         self.login()
@@ -117,30 +541,203 @@ class RestClient(object):
                     self.reset_login()
         return func_wrapper
 
+    def _send(self, method, url, params, data, timeout, deadline,
+              pooled=False):
+        timeout = _cap_timeout(timeout, self._remaining_time(deadline))
+        if method.lower() not in ['get', 'post', 'put', 'delete']:
+            raise RequestException('Method "{}" not supported'
+                                   .format(method.upper()), None)
+        with self._checkout_session(pooled) as session:
+            if method.lower() == 'get':
+                return session.get(url, headers=self.headers,
+                                   params=params, auth=self.auth,
+                                   timeout=timeout)
+            if method.lower() == 'post':
+                return session.post(url, headers=self.headers,
+                                    params=params, data=data,
+                                    auth=self.auth, timeout=timeout)
+            if method.lower() == 'put':
+                return session.put(url, headers=self.headers,
+                                   params=params, data=data,
+                                   auth=self.auth, timeout=timeout)
+            return session.delete(url, headers=self.headers,
+                                  params=params, data=data,
+                                  auth=self.auth, timeout=timeout)
+
+    def _send_timed(self, hedge_policy, *args):
+        start = monotonic()
+        resp = self._send(*args)
+        hedge_policy.record(monotonic() - start)
+        return resp
+
+    def _send_hedge(self, race, aborter, hedge_policy, args):
+        try:
+            with aborter.track():
+                resp = self._send_timed(hedge_policy, *args)
+        except Exception as ex:  # pylint: disable=broad-except
+            race.hedge_done(None, ex)
+            return
+        race.hedge_done(resp, None)
+
+    def _start_hedge(self, race, hedge_policy, limiters, args):
+        # called from the hedge scheduler thread once the hedge delay elapsed
+        # the hedge budget and the rate limit tokens are only spent if the
+        # request is still pending
+        acquire = functools.partial(TokenBucket.try_acquire_all, limiters)
+        aborter = race.start_hedge(functools.partial(hedge_policy.try_hedge,
+                                                     acquire))
+        if aborter is None:
+            return
+        logger.debug("%s REST API %s req not answered in time, sending "
+                     "hedged request", self.client_name, args[0].upper())
+        thread = threading.Thread(target=self._send_hedge,
+                                  args=(race, aborter, hedge_policy, args))
+        thread.daemon = True
+        thread.start()
+
+    def _send_hedged(self, hedge_policy, limiters, *args):
+        from .connection import ConnectionAborter
+
+        hedge_delay = hedge_policy.next_delay()
+        if hedge_delay is None:
+            return self._send_timed(hedge_policy, *args)
+        # a forked process rebuilds its sessions before the hedge is
+        # scheduled, so that the hedge does not use those of the parent
+        self._check_fork()
+        race = _HedgeRace(ConnectionAborter)
+        # per-thread sessions are never shared, nor created for the short
+        # lived hedge threads, which use the session pool instead
+        hedge_args = args + (True,) \
+            if self.session_strategy == 'thread' else args
+        timer = hedge_scheduler.schedule(
+            hedge_delay, functools.partial(self._start_hedge, race,
+                                           hedge_policy, limiters,
+                                           hedge_args))
+        resp, error = None, None
+        try:
+            with race.primary.track():
+                resp = self._send_timed(hedge_policy, *args)
+        except Exception as ex:  # pylint: disable=broad-except
+            error = ex
+        hedge_scheduler.cancel(timer)
+        return race.primary_done(resp, error)
+
+    def _acquire(self, limiters, rate_limit_deadline, deadline):
+        # the tokens are taken from all the limiters at once, so that none is
+        # spent when another limiter gives up
+        if deadline is not None and (rate_limit_deadline is None or
+                                     deadline < rate_limit_deadline):
+            try:
+                TokenBucket.acquire_all(limiters,
+                                        self._remaining_time(deadline))
+            except RateLimitExceededException:
+                raise DeadlineExceededException(
+                    "{} REST API deadline exceeded while waiting for the "
+                    "rate limit".format(self.client_name))
+        elif rate_limit_deadline is not None:
+            TokenBucket.acquire_all(limiters, max(0, rate_limit_deadline -
+                                                  monotonic()))
+        else:
+            TokenBucket.acquire_all(limiters)
+
+    def _send_rate_limited(self, method, url, params, data, rate_limiter,
+                           timeout, deadline, hedge_policy):
+        limiters = [limiter for limiter in (self.rate_limiter, rate_limiter)
+                    if limiter is not None]
+        if hedge_policy is not None and method.lower() == 'get':
+            send = functools.partial(self._send_hedged, hedge_policy,
+                                     limiters)
+        else:
+            send = self._send
+        if not limiters:
+            return send(method, url, params, data, timeout, deadline)
+        rate_limit_deadline = None
+        if self.rate_limit_timeout is not None:
+            rate_limit_deadline = monotonic() + self.rate_limit_timeout
+        while True:
+            self._acquire(limiters, rate_limit_deadline, deadline)
+            resp = send(method, url, params, data, timeout, deadline)
+            for limiter in limiters:
+                limiter.update(resp.status_code, resp.headers)
+            if resp.status_code != 429:
+                return resp
+            logger.warning("%s REST API %s req was rate limited, throttling "
+                           "down", self.client_name, method.upper())
+
+    def _timeout_error(self, method, deadline):
+        if deadline is not None and monotonic() >= deadline:
+            logger.error("%s REST API %s req deadline exceeded",
+                         self.client_name, method.upper())
+            return DeadlineExceededException("{} REST API deadline exceeded"
+                                             .format(self.client_name))
+        logger.error("%s REST API %s req timed out", self.client_name,
+                     method.upper())
+        return RequestTimeoutException("{} REST API request timed out"
+                                       .format(self.client_name))
+
+    def _connection_error(self, method, ex):
+        import re
+        try:
+            from requests.packages.urllib3.exceptions import SSLError
+        except ImportError:
+            from urllib3.exceptions import SSLError
+
+        if ex.args:
+            if isinstance(ex.args[0], SSLError):
+                errno = "n/a"
+                strerror = "SSL error. Probably trying to access a non " \
+                           "SSL connection."
+                logger.error("%s REST API failed %s, SSL error.",
+                             self.client_name, method.upper())
+            else:
+                match = re.match(r'.*: \[Errno (-?\d+)\] (.+)',
+                                 # pylint: disable=E1101
+                                 ex.args[0].reason.args[0])
+                if match:
+                    errno = match.group(1)
+                    strerror = match.group(2)
+                    logger.error("%s REST API failed %s, connection error: "
+                                 "[errno: %s] %s", self.client_name,
+                                 method.upper(), errno, strerror)
+                else:
+                    errno = "n/a"
+                    strerror = "n/a"
+                    logger.error("%s REST API failed %s, connection error.",
+                                 self.client_name, method.upper())
+        else:
+            errno = "n/a"
+            strerror = "n/a"
+            logger.error("%s REST API failed %s, connection error.",
+                         self.client_name, method.upper())
+
+        if errno != "n/a":
+            ex_msg = ("{} REST API cannot be reached: {} [errno {}]. "
+                      "Please check your configuration and that the API "
+                      "endpoint is accessible"
+                      .format(self.client_name, strerror, errno))
+        else:
+            ex_msg = ("{} REST API cannot be reached. Please check "
+                      "your configuration and that the API endpoint is "
+                      "accessible".format(self.client_name))
+        return RequestException(ex_msg, conn_errno=errno,
+                                conn_strerror=strerror)
+
     def do_request(self, method, path, params=None, data=None,
-                   raw_content=False):
+                   raw_content=False, rate_limiter=None, timeout=None,
+                   hedge_policy=None):
+        import requests
+
         url = '{}{}'.format(self.base_url, path)
         logger.debug('%s REST API %s req: %s data: %s', self.client_name,
                      method.upper(), path, data)
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = self._active_deadline()
+        if deadline is None and self.deadline is not None:
+            deadline = monotonic() + self.deadline
         try:
-            if method.lower() == 'get':
-                resp = self.session.get(url, headers=self.headers,
-                                        params=params, auth=self.auth)
-            elif method.lower() == 'post':
-                resp = self.session.post(url, headers=self.headers,
-                                         params=params, data=data,
-                                         auth=self.auth)
-            elif method.lower() == 'put':
-                resp = self.session.put(url, headers=self.headers,
-                                        params=params, data=data,
-                                        auth=self.auth)
-            elif method.lower() == 'delete':
-                resp = self.session.delete(url, headers=self.headers,
-                                           params=params, data=data,
-                                           auth=self.auth)
-            else:
-                raise RequestException('Method "{}" not supported'
-                                       .format(method.upper()), None)
+            resp = self._send_rate_limited(method, url, params, data,
+                                           rate_limiter, timeout, deadline,
+                                           hedge_policy)
             if resp.ok:
                 logger.debug("%s REST API %s res status: %s content: %s",
                              self.client_name, method.upper(),
@@ -166,77 +763,60 @@ class RestClient(object):
                                        " code {}".format(self.client_name,
                                                          resp.status_code),
                                        resp.status_code, resp.content)
-        except ConnectionError as ex:
-            if ex.args:
-                if isinstance(ex.args[0], SSLError):
-                    errno = "n/a"
-                    strerror = "SSL error. Probably trying to access a non " \
-                               "SSL connection."
-                    logger.error("%s REST API failed %s, SSL error.",
-                                 self.client_name, method.upper())
-                else:
-                    match = re.match(r'.*: \[Errno (-?\d+)\] (.+)',
-                                     # pylint: disable=E1101
-                                     ex.args[0].reason.args[0])
-                    if match:
-                        errno = match.group(1)
-                        strerror = match.group(2)
-                        logger.error("%s REST API failed %s, connection error:"
-                                     " [errno: %s] %s", self.client_name,
-                                     method.upper(), errno, strerror)
-                    else:
-                        errno = "n/a"
-                        strerror = "n/a"
-                        logger.error(
-                            "%s REST API failed %s, connection error.",
-                            self.client_name, method.upper())
-            else:
-                errno = "n/a"
-                strerror = "n/a"
-                logger.error("%s REST API failed %s, connection error.",
-                             self.client_name, method.upper())
+        except requests.Timeout:
+            raise self._timeout_error(method, deadline)
+        except requests.ConnectionError as ex:
+            raise self._connection_error(method, ex)
 
-            if errno != "n/a":
-                ex_msg = ("{} REST API cannot be reached: {} [errno {}]. "
-                          "Please check your configuration and that the API "
-                          "endpoint is accessible"
-                          .format(self.client_name, strerror, errno))
-            else:
-                ex_msg = ("{} REST API cannot be reached. Please check "
-                          "your configuration and that the API endpoint is "
-                          "accessible".format(self.client_name))
-            raise RequestException(ex_msg, conn_errno=errno,
-                                   conn_strerror=strerror)
+    def _endpoint_settings(self, method, path, api_kwargs):
+        settings = {'timeout': api_kwargs.get('timeout', None)}
+        if api_kwargs.get('rate_limit', None):
+            settings['rate_limiter'] = self._endpoint_rate_limiter(
+                method, path, api_kwargs['rate_limit'],
+                api_kwargs.get('rate_limit_burst', None))
+        if api_kwargs.get('hedge', False):
+            settings['hedge_policy'] = self._endpoint_hedge_policy(
+                method, path, api_kwargs.get('hedge_delay', None))
+        return settings
 
     @staticmethod
     def api(path, **api_kwargs):
+        method = api_kwargs.get('method', None)
+        if api_kwargs.get('hedge', False) and method != 'get':
+            # hedging sends requests twice, which only GET requests allow
+            raise Exception("Only GET endpoints can be hedged")
+
         def call_decorator(func):
             def func_wrapper(self, *args, **kwargs):
-                method = api_kwargs.get('method', None)
-                resp_structure = api_kwargs.get('resp_structure', None)
-                args_name = inspect.getargspec(func).args
-                args_dict = dict(itertools.izip(args_name[1:], args))
-                for key, val in kwargs:
-                    args_dict[key] = val
-                return func(self, *args, request=_Request(method, path,
-                                                          args_dict, self,
-                                                          resp_structure),
-                            **kwargs)
+                # pylint: disable=W0212
+                args_dict = dict(zip(_arg_names(func)[1:], args))
+                args_dict.update(kwargs)
+                request = _Request(method, path, args_dict, self,
+                                   api_kwargs.get('resp_structure', None),
+                                   **self._endpoint_settings(method, path,
+                                                             api_kwargs))
+                with self._deadline_scope(api_kwargs.get('deadline',
+                                                         self.deadline)):
+                    return func(self, *args, request=request, **kwargs)
             return func_wrapper
         return call_decorator
 
     @classmethod
-    def api_get(cls, path, resp_structure=None):
-        return cls.api(path, method='get', resp_structure=resp_structure)
+    def api_get(cls, path, resp_structure=None, **api_kwargs):
+        return cls.api(path, method='get', resp_structure=resp_structure,
+                       **api_kwargs)
 
     @classmethod
-    def api_post(cls, path, resp_structure=None):
-        return cls.api(path, method='post', resp_structure=resp_structure)
+    def api_post(cls, path, resp_structure=None, **api_kwargs):
+        return cls.api(path, method='post', resp_structure=resp_structure,
+                       **api_kwargs)
 
     @classmethod
-    def api_put(cls, path, resp_structure=None):
-        return cls.api(path, method='put', resp_structure=resp_structure)
+    def api_put(cls, path, resp_structure=None, **api_kwargs):
+        return cls.api(path, method='put', resp_structure=resp_structure,
+                       **api_kwargs)
 
     @classmethod
-    def api_delete(cls, path, resp_structure=None):
-        return cls.api(path, method='delete', resp_structure=resp_structure)
+    def api_delete(cls, path, resp_structure=None, **api_kwargs):
+        return cls.api(path, method='delete', resp_structure=resp_structure,
+                       **api_kwargs)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+ *   Copyright (c) 2017 SUSE LLC
+ *
+ *  openATTIC is free software; you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation; version 2.
+ *
+ *  This package is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+"""
+
+from __future__ import absolute_import
+
+import contextlib
+import socket
+import ssl
+import threading
+
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+try:
+    from requests.packages.urllib3.connectionpool import \
+        HTTPConnectionPool, HTTPSConnectionPool
+    from requests.packages.urllib3.exceptions import HTTPError
+    from requests.packages.urllib3.util.connection import allowed_gai_family
+    from requests.packages.urllib3.util.ssl_ import create_urllib3_context
+except ImportError:
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.exceptions import HTTPError
+    from urllib3.util.connection import allowed_gai_family
+    from urllib3.util.ssl_ import create_urllib3_context
+
+from ..utils import monotonic
+
+
+TLS_SESSION_REUSE_SUPPORTED = hasattr(ssl.SSLSocket, 'session')
+
+_local = threading.local()
+
+
+class DNSCache(object):
+    """In-process cache of host name resolutions
+    Resolutions are kept for `ttl` seconds, as the system resolver does not
+    expose the TTL of the DNS records. All the addresses of a host are kept,
+    in the order of the resolver, except for the addresses that failed to
+    connect, which are moved behind the others.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """Returns the addresses of `host`, or [`host`] if it cannot be
+        resolved
+        Resolution errors are left to be reported by the connection attempt.
+        Only the address families allowed by urllib3 are returned.
+        """
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[1] > monotonic():
+            return list(entry[0])
+        try:
+            infos = socket.getaddrinfo(host, port, allowed_gai_family(),
+                                       socket.SOCK_STREAM)
+        except socket.gaierror:
+            return [host]
+        addresses = []
+        for info in infos:
+            if info[4][0] not in addresses:
+                addresses.append(info[4][0])
+        with self._lock:
+            self._entries[key] = (addresses, monotonic() + self.ttl)
+        return list(addresses)
+
+    def demote(self, host, port, address):
+        """Moves an address of `host` that failed behind the other ones"""
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and address in entry[0]:
+                addresses = [addr for addr in entry[0] if addr != address]
+                self._entries[key] = (addresses + [address], entry[1])
+
+    def invalidate(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+def _shutdown(sock):
+    if sock is None:
+        return
+    try:
+        # the SSL layer of the socket is bypassed, as it must not be torn
+        # down while another thread is reading from it
+        socket.socket.shutdown(getattr(sock, 'socket', sock),
+                               socket.SHUT_RDWR)
+    except (socket.error, TypeError):
+        pass
+
+
+class ConnectionAborter(object):
+    """Aborts the request sent by a thread through a WarmPoolAdapter
+    The connections checked out by the thread within `track` are shut down by
+    `abort`, which can be called from any thread and makes the request fail
+    with a connection error. A connection that is still being established
+    when the request is aborted is shut down once it is connected.
+    """
+
+    def __init__(self):
+        self.aborted = False
+        self._conns = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def track(self):
+        _local.aborter = self
+        try:
+            yield self
+        finally:
+            _local.aborter = None
+            with self._lock:
+                del self._conns[:]
+
+    def abort(self):
+        with self._lock:
+            self.aborted = True
+            for conn in self._conns:
+                _shutdown(conn.sock)
+
+    def _add(self, conn):
+        with self._lock:
+            self._conns.append(conn)
+
+    def _remove(self, conn):
+        # connections are forgotten before being returned to the pool, from
+        # where they can be checked out by other requests
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+
+
+class _WarmConnectionMixin(object):
+    dns_cache = None
+
+    def _new_conn(self):
+        if self.dns_cache is None:
+            return super(_WarmConnectionMixin, self)._new_conn()
+        # the resolved addresses only replace the host name while the socket
+        # is being connected, SNI and certificate checks still use the name
+        attr = '_dns_host' if hasattr(self, '_dns_host') else 'host'
+        host = getattr(self, attr)
+        error = None
+        try:
+            for address in self.dns_cache.resolve(host, self.port):
+                setattr(self, attr, address)
+                try:
+                    return super(_WarmConnectionMixin, self)._new_conn()
+                except HTTPError as ex:
+                    self.dns_cache.demote(host, self.port, address)
+                    error = ex
+        finally:
+            setattr(self, attr, host)
+        self.dns_cache.invalidate(host, self.port)
+        raise error
+
+    def connect(self):
+        super(_WarmConnectionMixin, self).connect()
+        aborter = getattr(_local, 'aborter', None)
+        if aborter is not None and aborter.aborted:
+            aborter.abort()
+
+
+class _WarmPoolMixin(object):
+    # pylint: disable=W0212
+
+    def _get_conn(self, timeout=None):
+        conn = super(_WarmPoolMixin, self)._get_conn(timeout)
+        aborter = getattr(_local, 'aborter', None)
+        if aborter is not None:
+            aborter._add(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        aborter = getattr(_local, 'aborter', None)
+        if aborter is not None:
+            aborter._remove(conn)
+        super(_WarmPoolMixin, self)._put_conn(conn)
+
+
+def _warm_pool_classes(dns_cache):
+    classes = {}
+    for scheme, pool_cls in [('http', HTTPConnectionPool),
+                             ('https', HTTPSConnectionPool)]:
+        conn_cls = type('Warm' + pool_cls.ConnectionCls.__name__,
+                        (_WarmConnectionMixin, pool_cls.ConnectionCls),
+                        {'dns_cache': dns_cache})
+        classes[scheme] = type('Warm' + pool_cls.__name__,
+                               (_WarmPoolMixin, pool_cls),
+                               {'ConnectionCls': conn_cls})
+    return classes
+
+
+class _SessionSavingSSLSocket(ssl.SSLSocket):  # pylint: disable=W0223
+    # TLS 1.3 session tickets are only received after the handshake, hence
+    # the session is saved once the first response bytes are read
+    _session_saved = False
+
+    def read(self, *args, **kwargs):
+        data = super(_SessionSavingSSLSocket, self).read(*args, **kwargs)
+        if not self._session_saved:
+            self._session_saved = True
+            self.context.save_session(self.server_hostname, self.session)
+        return data
+
+
+class TLSSessionContext(ssl.SSLContext):
+    """SSL context that resumes the TLS sessions of previous connections
+    Resuming a session skips the certificate exchange and the key agreement
+    of a full TLS handshake. Sessions are kept per server host name.
+    Requires Python 3.6 or newer, see TLS_SESSION_REUSE_SUPPORTED.
+    """
+
+    sslsocket_class = _SessionSavingSSLSocket
+
+    def __new__(cls, protocol=None):
+        if protocol is None:
+            protocol = getattr(ssl, 'PROTOCOL_TLS_CLIENT',
+                               ssl.PROTOCOL_SSLv23)
+        return super(TLSSessionContext, cls).__new__(cls, protocol)
+
+    def __init__(self, protocol=None):
+        # pylint: disable=unused-argument
+        super(TLSSessionContext, self).__init__()
+        # mimic the urllib3 defaults, which checks the host names on its own
+        self.options |= create_urllib3_context().options
+        self.check_hostname = False
+        self.verify_mode = ssl.CERT_REQUIRED
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def save_session(self, server_hostname, session):
+        if server_hostname is None or session is None:
+            return
+        with self._sessions_lock:
+            self._sessions[server_hostname] = session
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        server_hostname = kwargs.get('server_hostname')
+        if server_hostname is not None and kwargs.get('session') is None:
+            with self._sessions_lock:
+                kwargs['session'] = self._sessions.get(server_hostname)
+        return super(TLSSessionContext, self).wrap_socket(sock, *args,
+                                                          **kwargs)
+
+
+class WarmPoolAdapter(HTTPAdapter):
+    """Transport adapter with DNS caching and TLS session reuse
+    Connections resolve their host through `dns_cache`, if given, and TLS
+    connections are established with `ssl_context`, if given, which is meant
+    to be a TLSSessionContext shared by the adapters of a client.
+    Requests sent through the adapter can be aborted, see ConnectionAborter.
+    """
+
+    def __init__(self, dns_cache=None, ssl_context=None, **kwargs):
+        self.dns_cache = dns_cache
+        self.ssl_context = ssl_context
+        super(WarmPoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK,
+                         **pool_kwargs):
+        if self.ssl_context is not None:
+            pool_kwargs.setdefault('ssl_context', self.ssl_context)
+        super(WarmPoolAdapter, self).init_poolmanager(connections, maxsize,
+                                                      block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = \
+            _warm_pool_classes(self.dns_cache)
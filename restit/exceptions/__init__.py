@@ -33,3 +33,17 @@ class MalformedStructureException(Exception):
     def __init__(self, message):
         super(MalformedStructureException, self).__init__(
             "Malformed validation structure" if message is None else message)
+
+
+class RateLimitExceededException(RequestException):
+    def __init__(self, message):
+        super(RateLimitExceededException, self).__init__(message, 429)
+
+
+class RequestTimeoutException(RequestException):
+    def __init__(self, message):
+        super(RequestTimeoutException, self).__init__(message)
+
+
+class DeadlineExceededException(RequestTimeoutException):
+    pass
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+ *   Copyright (c) 2017 SUSE LLC
+ *
+ *  openATTIC is free software; you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation; version 2.
+ *
+ *  This package is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+"""
+
+from __future__ import absolute_import, division
+
+import collections
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+
+from ..utils import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy(object):
+    """Hedging policy of an idempotent endpoint
+    A hedged request sends a second, identical, request if the first one has
+    not been answered after the hedge delay, and uses whichever response
+    arrives first.
+    The hedge delay is either the fixed `delay`, in seconds, or the
+    `percentile` of the latencies observed in the last `window` requests.
+    In the latter case no request is hedged until `min_samples` latencies
+    have been observed.
+    To keep hedging from amplifying the load on the server, each request
+    earns `max_ratio` of a hedge and each hedge costs a whole one, hence at
+    most `max_ratio` of the requests are hedged in the long run. The budget
+    is capped at MAX_BUDGET, so that a burst of slow responses after a quiet
+    period does not fire a burst of hedges.
+    """
+
+    MAX_BUDGET = 1
+    # the budget is counted in millionths of a hedge, as summing up float
+    # ratios would take one request too many to earn a hedge
+    BUDGET_UNIT = 10**6
+
+    def __init__(self, delay=None, percentile=95, max_ratio=0.1, window=100,
+                 min_samples=20):
+        self.delay = delay
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._budget = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def next_delay(self):
+        """Accounts for a new request and returns its hedge delay
+        Returns None if the request cannot be hedged.
+        """
+        with self._lock:
+            self._budget = min(
+                self.MAX_BUDGET * self.BUDGET_UNIT,
+                self._budget + int(round(self.max_ratio * self.BUDGET_UNIT)))
+            if self._budget < self.BUDGET_UNIT:
+                return None
+            if self.delay is not None:
+                return self.delay
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+            idx = int(math.ceil(self.percentile / 100 * len(latencies))) - 1
+            return latencies[max(0, idx)]
+
+    def try_hedge(self, acquire=None):
+        """Takes a hedge from the budget, returns False if none is left
+        `acquire`, if given, is called once the budget is checked and can veto
+        the hedge by returning False, in which case the budget is left as is.
+        """
+        with self._lock:
+            if self._budget < self.BUDGET_UNIT:
+                return False
+            if acquire is not None and not acquire():
+                return False
+            self._budget -= self.BUDGET_UNIT
+            return True
+
+
+class HedgeScheduler(object):
+    """Runs the hedges of requests once their hedge delay has elapsed
+    Hedges are scheduled with `schedule` and started from a single background
+    thread, hence requests that are answered within their hedge delay never
+    start a thread of their own. All the clients share the `scheduler`
+    instance, and thus a single thread.
+    A scheduler used by a forked process starts a thread of its own, as the
+    thread of the parent process does not exist in the child.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._reset_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # the condition inherited from the parent might even be held by its
+        # thread, hence it is replaced as well
+        if self._pid != os.getpid():
+            with self._reset_lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+    def schedule(self, delay, callback):
+        """Calls `callback` after `delay` seconds, returns a handle to cancel
+        the call
+        """
+        self._check_fork()
+        entry = [monotonic() + delay, next(self._counter), callback]
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def cancel(self, entry):
+        """Cancels the call, which might however be running already"""
+        self._check_fork()
+        with self._cond:
+            entry[2] = None
+
+    def _next_callback(self):
+        with self._cond:
+            while True:
+                now = monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    entry = heapq.heappop(self._queue)
+                    if entry[2] is not None:
+                        return entry[2]
+                elif self._queue:
+                    self._cond.wait(self._queue[0][0] - now)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            callback = self._next_callback()
+            try:
+                callback()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to start hedged request")
+
+
+scheduler = HedgeScheduler()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+ *   Copyright (c) 2017 SUSE LLC
+ *
+ *  openATTIC is free software; you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation; version 2.
+ *
+ *  This package is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+"""
+
+from __future__ import absolute_import, division
+
+import threading
+import time
+
+from ..exceptions import RateLimitExceededException
+from ..utils import monotonic
+
+
+class TokenBucket(object):
+    """Adaptive token bucket rate limiter
+    A bucket holds up to `burst` tokens and is refilled at `rate` tokens per
+    second. Each request consumes one token, and callers block in `acquire`
+    until a token is available.
+    The bucket adapts to the rate limiting information sent by the server
+    through the `update` method:
+      * `Retry-After` blocks the bucket for the given delay.
+      * `X-RateLimit-Remaining` and `X-RateLimit-Reset` lower the refill rate
+        so that the remaining quota is spread until the reset time, or block
+        the bucket until the reset time if the quota is exhausted.
+      * a 429 response without any of the above headers halves the refill
+        rate, which then slowly recovers with each successful response.
+    The refill rate never goes above the configured `rate`.
+    """
+
+    MIN_RATE = 0.01
+    RECOVERY_FACTOR = 1.1
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("Rate limit must be a positive number")
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.burst = float(burst if burst else max(1, int(rate)))
+        self.tokens = self.burst
+        self.blocked_until = None
+        self._last_refill = monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _wait_time(self, now):
+        self._refill(now)
+        if self.blocked_until is not None:
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self.blocked_until = None
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """Takes a token from the bucket, blocking until one is available
+        Raises RateLimitExceededException if no token becomes available within
+        `timeout` seconds.
+        """
+        TokenBucket.acquire_all([self], timeout)
+
+    @staticmethod
+    def acquire_all(buckets, timeout=None):
+        """Takes a token from each bucket, blocking until all of them have one
+        available
+        No token is taken from any bucket until all of them can give one, and
+        RateLimitExceededException is raised if that does not happen within
+        `timeout` seconds.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            wait = TokenBucket._take_all(buckets)
+            if wait <= 0:
+                return
+            if deadline is not None and monotonic() + wait > deadline:
+                raise RateLimitExceededException(
+                    "Rate limit would be exceeded: no request slot available "
+                    "within {} seconds".format(timeout))
+            time.sleep(wait)
+
+    @staticmethod
+    def try_acquire_all(buckets):
+        """Takes a token from each bucket if all of them have one available
+        Returns False, without taking any token, otherwise.
+        """
+        return TokenBucket._take_all(buckets) <= 0
+
+    @staticmethod
+    def _take_all(buckets):
+        """Takes a token from each bucket if all of them have one available
+        Returns the time to wait until they do otherwise.
+        """
+        # pylint: disable=W0212
+        # the buckets are locked in a consistent order to avoid deadlocks
+        buckets = sorted(buckets, key=id)
+        locked = []
+        try:
+            for bucket in buckets:
+                bucket._lock.acquire()
+                locked.append(bucket)
+            now = monotonic()
+            wait = max([bucket._wait_time(now) for bucket in buckets] or [0])
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.tokens -= 1
+            return wait
+        finally:
+            for bucket in reversed(locked):
+                bucket._lock.release()
+
+    def update(self, status_code, headers):
+        """Adapts the bucket to the rate limiting headers of a response"""
+        with self._lock:
+            now = monotonic()
+            self._refill(now)
+            retry_after = _parse_retry_after(headers.get('Retry-After'))
+            remaining = _parse_number(headers.get('X-RateLimit-Remaining'))
+            reset = _parse_reset(headers.get('X-RateLimit-Reset'))
+
+            if retry_after is not None:
+                self._block(now + retry_after)
+            elif remaining is not None and reset is not None:
+                if remaining < 1:
+                    self._block(now + reset)
+                elif reset > 0:
+                    self.rate = max(self.MIN_RATE,
+                                    min(self.max_rate, remaining / reset))
+            elif status_code == 429:
+                self.rate = max(self.MIN_RATE, self.rate / 2)
+                self.tokens = min(self.tokens, 0)
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate,
+                                self.rate * self.RECOVERY_FACTOR)
+
+    def _block(self, until):
+        self.tokens = min(self.tokens, 0)
+        if self.blocked_until is None or until > self.blocked_until:
+            self.blocked_until = until
+
+
+def _parse_number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value):
+    """Returns the Retry-After delay in seconds
+    The header value can either be a number of seconds or an HTTP date.
+    """
+    if value is None:
+        return None
+    delay = _parse_number(value)
+    if delay is None:
+        import email.utils
+
+        date = email.utils.parsedate_tz(value)
+        if date is None:
+            return None
+        delay = email.utils.mktime_tz(date) - time.time()
+    return max(0.0, delay)
+
+
+def _parse_reset(value):
+    """Returns the X-RateLimit-Reset delay in seconds
+    Servers either send the number of seconds until the reset or the UTC epoch
+    timestamp of the reset, the latter being distinguished by its magnitude.
+    """
+    reset = _parse_number(value)
+    if reset is None:
+        return None
+    if reset > 10**9:
+        reset -= time.time()
+    return max(0.0, reset)
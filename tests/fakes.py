@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Fake requests sessions shared by the tests of the client
+"""
+
+import json
+import threading
+import time
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+from requests import ReadTimeout
+
+
+class FakeResponse(object):
+    def __init__(self, status_code=200, headers=None, text=''):
+        self.status_code = status_code
+        self.headers = headers if headers else {}
+        self.text = text
+        self.content = text
+        self.ok = status_code < 400
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.text)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession(object):
+    """Session answering each request with the next of `responses`
+    A response can be an exception, which is then raised. Each request takes
+    the next of `delays` seconds, if given, and raises ReadTimeout if that is
+    longer than the read timeout of the request. Once exhausted, the last
+    response and delay are repeated.
+    """
+
+    def __init__(self, responses=None, delays=None):
+        self.responses = list(responses) if responses else [FakeResponse()]
+        self.delays = list(delays) if delays else [0]
+        self.requests = 0
+        self.urls = []
+        self.timeouts = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def _next(self, items):
+        return items.pop(0) if len(items) > 1 else items[0]
+
+    def request(self, url, timeout=None):
+        with self._lock:
+            self.requests += 1
+            self.urls.append(url)
+            self.threads.append(threading.current_thread())
+            self.timeouts.append(timeout)
+            response = self._next(self.responses)
+            delay = self._next(self.delays)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise ReadTimeout()
+        time.sleep(delay)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request(url, kwargs.get('timeout'))
+
+    post = put = delete = get
+
+    def close(self):
+        pass
+
+
+class PingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.server.pings.append(self.client_address)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(self.client_address)
+        time.sleep(self.server.next_delay())
+        body = json.dumps(len(self.server.requests)).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PingServer(ThreadingMixIn, HTTPServer):
+    """Local HTTP server answering GET requests with their sequence number
+    Each GET request is delayed by the next of `delays` seconds, if given.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delays=None):
+        HTTPServer.__init__(self, ('localhost', 0), PingHandler)
+        self.pings = []
+        self.requests = []
+        self.delays = list(delays) if delays else []
+
+    def next_delay(self):
+        return self.delays.pop(0) if self.delays else 0
+
+    def handle_error(self, request, client_address):
+        # aborted requests leave broken connections behind
+        pass
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from restit import RestClient
+from fakes import FakeSession
+
+
+class PoolClient(RestClient):
+    @RestClient.api_get('/pools/{pool}/images/{image}')
+    def get_image(self, pool, image, request=None):
+        return request()
+
+
+class TestApiDecorator(TestCase):
+    def test_positional_path_params(self):
+        client = PoolClient('localhost', 8080)
+        client.session = FakeSession()
+        client.get_image('rbd', 'disk1')
+        self.assertEqual(client.session.urls,
+                         ['http://localhost:8080/pools/rbd/images/disk1'])
+
+    def test_keyword_path_params(self):
+        client = PoolClient('localhost', 8080)
+        client.session = FakeSession()
+        client.get_image('rbd', image='disk1')
+        self.assertEqual(client.session.urls,
+                         ['http://localhost:8080/pools/rbd/images/disk1'])
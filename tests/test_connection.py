@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+from unittest import TestCase
+try:
+    from requests.packages.urllib3.util.connection import allowed_gai_family
+except ImportError:
+    from urllib3.util.connection import allowed_gai_family
+from restit import RestClient
+from restit.connection import DNSCache
+from fakes import PingServer
+
+
+class FailingWarmupClient(RestClient):
+    def __init__(self, *args, **kwargs):
+        super(FailingWarmupClient, self).__init__(*args, **kwargs)
+        self.warmups = 0
+        self.warmed_up = threading.Event()
+
+    def warmup(self, n_connections=1, ping_path='/'):
+        self.warmups += 1
+        if self.warmups > 1:
+            self.warmed_up.set()
+        raise RuntimeError("warmup failed")
+
+
+def fake_getaddrinfo(calls, addresses):
+    def getaddrinfo(host, port, family=0, socktype=0, *args):
+        calls.append((host, port, family, socktype))
+        return [(socket.AF_INET, socktype, 6, '', (address, port))
+                for address in addresses]
+    return getaddrinfo
+
+
+class TestDNSCache(TestCase):
+    def setUp(self):
+        self.getaddrinfo = socket.getaddrinfo
+
+    def tearDown(self):
+        socket.getaddrinfo = self.getaddrinfo
+
+    def test_resolve(self):
+        cache = DNSCache(60)
+        addresses = cache.resolve('localhost', 80)
+        self.assertTrue(addresses)
+        for address in addresses:
+            self.assertIn(address, ['127.0.0.1', '::1'])
+        self.assertIn(('localhost', 80), cache._entries)
+
+    def test_all_addresses(self):
+        calls = []
+        socket.getaddrinfo = fake_getaddrinfo(
+            calls, ['10.0.0.1', '10.0.0.2', '10.0.0.1'])
+        cache = DNSCache(60)
+        self.assertEqual(cache.resolve('service', 80),
+                         ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(calls, [('service', 80, allowed_gai_family(),
+                                  socket.SOCK_STREAM)])
+
+    def test_demote(self):
+        socket.getaddrinfo = fake_getaddrinfo(
+            [], ['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+        cache = DNSCache(60)
+        cache.resolve('service', 80)
+        cache.demote('service', 80, '10.0.0.1')
+        self.assertEqual(cache.resolve('service', 80),
+                         ['10.0.0.2', '10.0.0.3', '10.0.0.1'])
+
+    def test_expired(self):
+        cache = DNSCache(0)
+        cache.resolve('localhost', 80)
+        cache._entries[('localhost', 80)] = (['10.0.0.1'], 0)
+        self.assertNotIn('10.0.0.1', cache.resolve('localhost', 80))
+
+    def test_cached(self):
+        cache = DNSCache(60)
+        cache.resolve('localhost', 80)
+        cache._entries[('localhost', 80)] = (['10.0.0.1'], float('inf'))
+        self.assertEqual(cache.resolve('localhost', 80), ['10.0.0.1'])
+
+    def test_unresolvable(self):
+        cache = DNSCache(60)
+        self.assertEqual(cache.resolve('host.invalid', 80), ['host.invalid'])
+        self.assertEqual(cache._entries, {})
+
+
+class TestWarmup(TestCase):
+    def setUp(self):
+        self.server = PingServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, **kwargs):
+        return RestClient('localhost', self.server.server_address[1],
+                          **kwargs)
+
+    def test_warmup(self):
+        client = self._client(dns_cache_ttl=60)
+        self.assertEqual(client.warmup(3), 3)
+        self.assertEqual(len(set(self.server.pings)), 3)
+        client.do_request('get', '/')
+        self.assertIn(self.server.requests[0], self.server.pings)
+
+    def test_warmup_capped_by_pool_size(self):
+        client = self._client(pool_maxsize=2)
+        self.assertEqual(client.warmup(5, ping_path=None), 2)
+
+    def test_warmup_unreachable(self):
+        client = RestClient('localhost', 1)
+        self.assertEqual(client.warmup(2), 0)
+
+    def test_warmup_bad_response(self):
+        listener = socket.socket()
+        listener.bind(('localhost', 0))
+        listener.listen(1)
+
+        def serve():
+            conn = listener.accept()[0]
+            conn.recv(1024)
+            conn.sendall(b'garbage\r\n\r\n')
+            conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.daemon = True
+        thread.start()
+        client = RestClient('localhost', listener.getsockname()[1])
+        try:
+            self.assertEqual(client.warmup(1), 0)
+        finally:
+            listener.close()
+
+    def test_failed_address_skipped(self):
+        client = self._client(dns_cache_ttl=60)
+        key = ('localhost', self.server.server_address[1])
+        client.dns_cache._entries[key] = (['127.0.0.2', '127.0.0.1'],
+                                          float('inf'))
+        client.do_request('get', '/')
+        self.assertEqual(client.dns_cache.resolve(*key),
+                         ['127.0.0.1', '127.0.0.2'])
+
+    def test_keepalive_survives_errors(self):
+        client = FailingWarmupClient('localhost', 1)
+        client.start_keepalive(0.01)
+        try:
+            self.assertTrue(client.warmed_up.wait(1))
+        finally:
+            client.stop_keepalive()
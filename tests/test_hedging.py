@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest import TestCase
+from restit import RestClient, _HedgeRace
+from restit.connection import ConnectionAborter
+from restit.hedging import HedgePolicy, HedgeScheduler
+from restit.utils import monotonic
+from fakes import FakeResponse, FakeSession, PingServer
+
+
+def attempts():
+    return [FakeResponse(text='"attempt {}"'.format(idx))
+            for idx in (1, 2)]
+
+
+class HedgedClient(RestClient):
+    @RestClient.api_get('/hedged', hedge=True, hedge_delay=0.05)
+    def hedged(self, request=None):
+        return request()
+
+
+class TestHedgePolicy(TestCase):
+    def test_fixed_delay(self):
+        policy = HedgePolicy(0.5, max_ratio=1)
+        self.assertEqual(policy.next_delay(), 0.5)
+
+    def test_adaptive_delay(self):
+        policy = HedgePolicy(max_ratio=1, min_samples=20)
+        for latency in range(1, 20):
+            policy.record(latency)
+        self.assertIsNone(policy.next_delay())
+        policy.record(20)
+        self.assertEqual(policy.next_delay(), 19)
+
+    def test_hedge_budget(self):
+        policy = HedgePolicy(0.5, max_ratio=0.5)
+        self.assertIsNone(policy.next_delay())
+        self.assertEqual(policy.next_delay(), 0.5)
+        self.assertTrue(policy.try_hedge())
+        self.assertIsNone(policy.next_delay())
+        self.assertFalse(policy.try_hedge())
+
+    def test_hedge_budget_ratio(self):
+        policy = HedgePolicy(0.5, max_ratio=0.1)
+        for _ in range(9):
+            self.assertIsNone(policy.next_delay())
+        self.assertEqual(policy.next_delay(), 0.5)
+
+    def test_hedge_budget_cap(self):
+        policy = HedgePolicy(0.5, max_ratio=1)
+        for _ in range(10):
+            policy.next_delay()
+        self.assertTrue(policy.try_hedge())
+        self.assertFalse(policy.try_hedge())
+
+    def test_hedge_vetoed(self):
+        policy = HedgePolicy(0.5, max_ratio=1)
+        policy.next_delay()
+        self.assertFalse(policy.try_hedge(lambda: False))
+        self.assertTrue(policy.try_hedge(lambda: True))
+
+
+class TestHedgeScheduler(TestCase):
+    def test_schedule(self):
+        scheduler = HedgeScheduler()
+        calls = []
+        done = threading.Event()
+        scheduler.schedule(0.02, lambda: calls.append(2) or done.set())
+        scheduler.schedule(0.01, lambda: calls.append(1))
+        cancelled = scheduler.schedule(0, lambda: calls.append(0))
+        scheduler.cancel(cancelled)
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [1, 2])
+
+
+class TestHedgedClient(TestCase):
+    def test_hedge_wins(self):
+        client = RestClient('localhost', 8080, hedge_max_ratio=1)
+        client.session = FakeSession(attempts(), [0.2, 0.01])
+        policy = client._endpoint_hedge_policy('get', '/', 0.05)
+        resp = client.do_request('get', '/', hedge_policy=policy)
+        self.assertEqual(resp, 'attempt 2')
+
+    def test_no_hedge_when_fast(self):
+        client = RestClient('localhost', 8080, hedge_max_ratio=1)
+        client.session = FakeSession(attempts(), [0.01])
+        policy = client._endpoint_hedge_policy('get', '/', 0.5)
+        resp = client.do_request('get', '/', hedge_policy=policy)
+        self.assertEqual(resp, 'attempt 1')
+        self.assertEqual(client.session.requests, 1)
+        self.assertEqual(client.session.threads, [threading.current_thread()])
+
+    def test_hedged_endpoint(self):
+        client = HedgedClient('localhost', 8080, hedge_max_ratio=1)
+        client.session = FakeSession(attempts(), [0.2, 0.01])
+        self.assertEqual(client.hedged(), 'attempt 2')
+        self.assertEqual(client.session.requests, 2)
+
+    def test_failed_hedge_does_not_win(self):
+        client = HedgedClient('localhost', 8080, hedge_max_ratio=1)
+        client.session = FakeSession([FakeResponse(text='"attempt 1"'),
+                                      FakeResponse(503)], [0.2, 0.01])
+        self.assertEqual(client.hedged(), 'attempt 1')
+        self.assertEqual(client.session.requests, 2)
+
+    def test_failed_request_waits_for_hedge(self):
+        client = HedgedClient('localhost', 8080, hedge_max_ratio=1)
+        client.session = FakeSession([FakeResponse(503),
+                                      FakeResponse(text='"attempt 2"')],
+                                     [0.1, 0.2])
+        self.assertEqual(client.hedged(), 'attempt 2')
+
+    def test_hedge_rate_limited(self):
+        client = HedgedClient('localhost', 8080, hedge_max_ratio=1,
+                              rate_limit=1, rate_limit_burst=1)
+        client.session = FakeSession(attempts(), [0.2, 0.01])
+        self.assertEqual(client.hedged(), 'attempt 1')
+        self.assertEqual(client.session.requests, 1)
+
+    def test_finished_race_spends_no_budget(self):
+        client = RestClient('localhost', 8080, hedge_max_ratio=1,
+                            rate_limit=0.01, rate_limit_burst=1)
+        policy = client._endpoint_hedge_policy('get', '/', 0.05)
+        policy.next_delay()
+        race = _HedgeRace(ConnectionAborter)
+        race.primary_done(FakeResponse(), None)
+        client._start_hedge(race, policy, [client.rate_limiter],
+                            ('get', '/', None, None, None, None))
+        self.assertTrue(policy.try_hedge())
+        client.rate_limiter.acquire(0)
+
+    def test_single_scheduler_thread(self):
+        threads = threading.active_count()
+        for _ in range(20):
+            client = HedgedClient('localhost', 8080, hedge_max_ratio=1)
+            client.session = FakeSession(attempts(), [0.01])
+            client.hedged()
+        self.assertLessEqual(threading.active_count(), threads + 1)
+
+    def test_only_get_is_hedged(self):
+        with self.assertRaises(Exception):
+            RestClient.api_post('/hedged', hedge=True)
+
+
+class TestHedgeAbort(TestCase):
+    def setUp(self):
+        self.server = PingServer(delays=[2])
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_slow_request_is_aborted(self):
+        client = HedgedClient('localhost', self.server.server_address[1],
+                              hedge_max_ratio=1)
+        start = monotonic()
+        self.assertEqual(client.hedged(), 2)
+        self.assertLess(monotonic() - start, 1)
+        self.assertEqual(len(self.server.requests), 2)
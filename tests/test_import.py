@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+from unittest import TestCase, skipIf
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['requests', 'urllib3', 'inspect', 'email.utils', 'socket']
+
+# the import time depends on the machine, hence the absolute budget, in
+# microseconds, is only checked when set in the environment
+IMPORT_TIME_BUDGET_US = os.environ.get('RESTIT_IMPORT_TIME_BUDGET_US')
+
+
+def imported_modules(module):
+    """Imports `module` in a new interpreter
+    Returns the names of all the modules loaded by then.
+    """
+    cmd = [sys.executable, '-c',
+           'import sys, {}; print("\\n".join(sys.modules))'.format(module)]
+    output = subprocess.check_output(cmd, cwd=ROOT_DIR)
+    return output.decode().split()
+
+
+def import_time(module):
+    """Imports `module` in a new interpreter with `-X importtime`
+    Returns the modules imported on behalf of `module` and its cumulative
+    import time in microseconds.
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', 'import ' + module]
+    # the first run may have to compile the sources
+    subprocess.check_output(cmd, cwd=ROOT_DIR, stderr=subprocess.STDOUT)
+    output = subprocess.check_output(cmd, cwd=ROOT_DIR,
+                                     stderr=subprocess.STDOUT)
+    imported = []
+    for line in output.decode().splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            # top level import, its children are listed before it
+            if name.strip() == module:
+                return imported, int(cumulative)
+            imported = []
+            continue
+        imported.append(name.strip())
+    raise AssertionError("{} was not imported".format(module))
+
+
+class TestLazyImports(TestCase):
+    def test_restit(self):
+        imported = imported_modules('restit')
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_validator(self):
+        imported = imported_modules('restit.validator')
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+
+@skipIf(sys.version_info < (3, 7), "-X importtime requires Python 3.7")
+class TestImportTime(TestCase):
+    def test_restit(self):
+        imported, _ = import_time('restit')
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    @skipIf(IMPORT_TIME_BUDGET_US is None,
+            "RESTIT_IMPORT_TIME_BUDGET_US is not set")
+    def test_restit_budget(self):
+        _, cumulative = import_time('restit')
+        self.assertLess(cumulative, int(IMPORT_TIME_BUDGET_US))
+
+    def test_validator(self):
+        imported, _ = import_time('restit.validator')
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from restit import RestClient
+from restit.exceptions import RequestException, \
+                              RateLimitExceededException
+from restit.ratelimit import TokenBucket
+from fakes import FakeResponse, FakeSession
+
+
+class RateLimitedClient(RestClient):
+    @RestClient.api_get('/limited', rate_limit=1, rate_limit_burst=2)
+    def limited(self, request=None):
+        return request()
+
+    @RestClient.api_get('/unlimited')
+    def unlimited(self, request=None):
+        return request()
+
+
+class TestTokenBucket(TestCase):
+    def test_burst(self):
+        bucket = TokenBucket(1, 3)
+        for _ in range(3):
+            bucket.acquire(0)
+        with self.assertRaises(RateLimitExceededException) as ctx:
+            bucket.acquire(0)
+        self.assertEqual(ctx.exception.status_code, 429)
+
+    def test_acquire_all(self):
+        available = TokenBucket(0.01, 1)
+        exhausted = TokenBucket(0.01, 1)
+        exhausted.acquire(0)
+        with self.assertRaises(RateLimitExceededException):
+            TokenBucket.acquire_all([available, exhausted], 0.01)
+        available.acquire(0)
+
+    def test_try_acquire_all(self):
+        available = TokenBucket(1000, 1)
+        exhausted = TokenBucket(1000, 1)
+        exhausted.acquire(0)
+        exhausted.update(429, {'Retry-After': '60'})
+        self.assertFalse(TokenBucket.try_acquire_all([available, exhausted]))
+        available.acquire(0)
+        self.assertTrue(TokenBucket.try_acquire_all([]))
+
+    def test_retry_after(self):
+        bucket = TokenBucket(1000)
+        bucket.update(429, {'Retry-After': '60'})
+        with self.assertRaises(RateLimitExceededException):
+            bucket.acquire(1)
+
+    def test_retry_after_elapsed(self):
+        bucket = TokenBucket(1000)
+        bucket.update(429, {'Retry-After': '0.01'})
+        bucket.acquire(1)
+
+    def test_ratelimit_headers_lower_rate(self):
+        bucket = TokenBucket(100)
+        bucket.update(200, {'X-RateLimit-Remaining': '10',
+                            'X-RateLimit-Reset': '5'})
+        self.assertEqual(bucket.rate, 2)
+
+    def test_ratelimit_headers_never_raise_rate(self):
+        bucket = TokenBucket(1)
+        bucket.update(200, {'X-RateLimit-Remaining': '100',
+                            'X-RateLimit-Reset': '1'})
+        self.assertEqual(bucket.rate, 1)
+
+    def test_ratelimit_exhausted(self):
+        bucket = TokenBucket(1000)
+        bucket.update(200, {'X-RateLimit-Remaining': '0',
+                            'X-RateLimit-Reset': '60'})
+        with self.assertRaises(RateLimitExceededException):
+            bucket.acquire(1)
+
+    def test_429_backoff_and_recovery(self):
+        bucket = TokenBucket(10)
+        bucket.update(429, {})
+        self.assertEqual(bucket.rate, 5)
+        for _ in range(20):
+            bucket.update(200, {})
+        self.assertEqual(bucket.rate, 10)
+
+
+class TestRateLimitedClient(TestCase):
+    def test_429_is_retried(self):
+        client = RestClient('localhost', 8080, rate_limit=1000,
+                            rate_limit_timeout=1)
+        client.session = FakeSession([
+            FakeResponse(429, {'Retry-After': '0.01'}),
+            FakeResponse(200)])
+        client.do_request('get', '/')
+        self.assertEqual(client.session.requests, 2)
+
+    def test_429_times_out(self):
+        client = RestClient('localhost', 8080, rate_limit=1000,
+                            rate_limit_timeout=0.1)
+        client.session = FakeSession([
+            FakeResponse(429, {'Retry-After': '60'})])
+        with self.assertRaises(RateLimitExceededException):
+            client.do_request('get', '/')
+
+    def test_429_without_rate_limit(self):
+        client = RestClient('localhost', 8080)
+        client.session = FakeSession([FakeResponse(429)])
+        with self.assertRaises(RequestException) as ctx:
+            client.do_request('get', '/')
+        self.assertEqual(ctx.exception.status_code, 429)
+
+    def test_endpoint_rate_limit(self):
+        client = RateLimitedClient('localhost', 8080, rate_limit_timeout=0)
+        client.session = FakeSession()
+        client.limited()
+        client.limited()
+        with self.assertRaises(RateLimitExceededException):
+            client.limited()
+        for _ in range(5):
+            client.unlimited()
+        self.assertEqual(client.session.requests, 7)
+
+    def test_rejected_request_spends_no_token(self):
+        client = RateLimitedClient('localhost', 8080, rate_limit=0.01,
+                                   rate_limit_burst=3, rate_limit_timeout=0)
+        client.session = FakeSession()
+        client.limited()
+        client.limited()
+        with self.assertRaises(RateLimitExceededException):
+            client.limited()
+        client.unlimited()
+        with self.assertRaises(RateLimitExceededException):
+            client.unlimited()
+        self.assertEqual(client.session.requests, 3)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from unittest import TestCase, skipIf
+from restit import RestClient
+from restit.utils import monotonic
+from fakes import FakeResponse, FakeSession, PingServer
+
+
+class CountingClient(RestClient):
+    def __init__(self, *args, **kwargs):
+        self.new_sessions = 0
+        super(CountingClient, self).__init__(*args, **kwargs)
+
+    @RestClient.api_get('/hedged', hedge=True, hedge_delay=0.05)
+    def hedged(self, request=None):
+        return request()
+
+    def _new_session(self):
+        self.new_sessions += 1
+        return super(CountingClient, self)._new_session()
+
+
+class FakeSessionClient(CountingClient):
+    def __init__(self, *args, **kwargs):
+        self.sessions = []
+        super(FakeSessionClient, self).__init__(*args, **kwargs)
+
+    def _new_session(self):
+        self.sessions.append(FakeSession(delays=[0.01]))
+        return self.sessions[-1]
+
+
+def session_in_thread(client):
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(client.session))
+    thread.start()
+    thread.join()
+    return sessions[0]
+
+
+class TestSessionStrategies(TestCase):
+    def test_invalid_strategy(self):
+        with self.assertRaises(ValueError):
+            RestClient('localhost', 8080, session_strategy='global')
+
+    def test_shared_session(self):
+        client = RestClient('localhost', 8080)
+        self.assertIs(client.session, session_in_thread(client))
+
+    def test_thread_session(self):
+        client = RestClient('localhost', 8080, session_strategy='thread')
+        self.assertIs(client.session, client.session)
+        self.assertIsNot(client.session, session_in_thread(client))
+
+    def test_pool_session(self):
+        client = RestClient('localhost', 8080, session_strategy='pool',
+                            session_pool_size=1)
+        with client._checkout_session() as session1:
+            with client._checkout_session() as session2:
+                self.assertIsNot(session1, session2)
+        with client._checkout_session() as session3:
+            self.assertIs(session3, session2)
+
+    def test_hedge_uses_pooled_session(self):
+        client = FakeSessionClient('localhost', 8080,
+                                   session_strategy='thread',
+                                   hedge_max_ratio=1)
+        client.session = FakeSession(delays=[0.2])
+        for _ in range(2):
+            client.hedged()
+        self.assertEqual(client.session.requests, 2)
+        self.assertEqual(set(client.session.threads),
+                         set([threading.current_thread()]))
+        self.assertEqual(len(client.sessions), 1)
+        self.assertEqual(client.sessions[0].requests, 2)
+
+    def test_pool_has_no_single_session(self):
+        client = RestClient('localhost', 8080, session_strategy='pool')
+        with self.assertRaises(Exception):
+            client.session  # pylint: disable=pointless-statement
+
+
+class TestForkSafety(TestCase):
+    def _fork(self, client):
+        client._pid = -1
+
+    def test_shared_session_rebuilt_after_fork(self):
+        client = RestClient('localhost', 8080)
+        session = client.session
+        self._fork(client)
+        self.assertIsNot(client.session, session)
+
+    def test_thread_session_rebuilt_after_fork(self):
+        client = RestClient('localhost', 8080, session_strategy='thread')
+        session = client.session
+        self._fork(client)
+        self.assertIsNot(client.session, session)
+
+    def test_pool_rebuilt_after_fork(self):
+        client = RestClient('localhost', 8080, session_strategy='pool')
+        with client._checkout_session() as session:
+            pass
+        self._fork(client)
+        with client._checkout_session() as new_session:
+            self.assertIsNot(new_session, session)
+
+    def test_sessions_rebuilt_once(self):
+        client = CountingClient('localhost', 8080)
+        self._fork(client)
+        threads = [threading.Thread(target=lambda: client.session)
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(client.new_sessions, 2)
+
+    def test_keepalive_restarted_after_fork(self):
+        client = RestClient('localhost', 8080)
+        client.start_keepalive(60)
+        stop = client._keepalive_stop
+        self._fork(client)
+        client.session  # pylint: disable=pointless-statement
+        self.assertIsNotNone(client._keepalive_stop)
+        self.assertIsNot(client._keepalive_stop, stop)
+        client.stop_keepalive()
+        self.assertIsNone(client._keepalive_stop)
+        self._fork(client)
+        client.session  # pylint: disable=pointless-statement
+        self.assertIsNone(client._keepalive_stop)
+        stop.set()
+
+
+@skipIf(not hasattr(os, 'fork'), "os.fork is not available")
+class TestForkedHedging(TestCase):
+    def setUp(self):
+        self.server = PingServer(delays=[2, 0, 2, 0])
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_hedged_in_forked_process(self):
+        client = CountingClient('localhost', self.server.server_address[1],
+                                hedge_max_ratio=1)
+        self.assertEqual(client.hedged(), 2)
+        pid = os.fork()
+        if pid == 0:
+            # the child reports through its exit status only
+            status = 1
+            try:
+                start = monotonic()
+                client.hedged()
+                status = 0 if monotonic() - start < 1 else 2
+            finally:
+                os._exit(status)  # pylint: disable=W0212
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+        self.assertEqual(len(self.server.requests), 4)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from requests import ReadTimeout
+from restit import RestClient
+from restit.exceptions import RequestException, RequestTimeoutException, \
+                              DeadlineExceededException
+from fakes import FakeSession
+
+
+class FakeLoginClient(RestClient):
+    def __init__(self, **kwargs):
+        super(FakeLoginClient, self).__init__('localhost', 8080, **kwargs)
+        self.logins = 0
+
+    def is_logged_in(self):
+        return False
+
+    def login(self):
+        self.logins += 1
+        self.do_request('get', '/login')
+
+    @RestClient.api_get('/fail', deadline=0.1)
+    @RestClient.requires_login
+    def fail_auth(self, request=None):
+        raise RequestException("Unauthorized", 401)
+
+
+class TimeoutClient(RestClient):
+    @RestClient.api_get('/fast', timeout=1)
+    def fast(self, request=None):
+        return request()
+
+    @RestClient.api_get('/slow', deadline=0.05)
+    def slow(self, request=None):
+        return request()
+
+
+class TestTimeouts(TestCase):
+    def test_no_timeout(self):
+        client = RestClient('localhost', 8080)
+        client.session = FakeSession()
+        client.do_request('get', '/')
+        self.assertEqual(client.session.timeouts, [None])
+
+    def test_client_timeout(self):
+        client = RestClient('localhost', 8080, timeout=(3, 10))
+        client.session = FakeSession()
+        client.do_request('get', '/')
+        self.assertEqual(client.session.timeouts, [(3, 10)])
+
+    def test_endpoint_timeout(self):
+        client = TimeoutClient('localhost', 8080, timeout=(3, 10))
+        client.session = FakeSession()
+        client.fast()
+        self.assertEqual(client.session.timeouts, [1])
+
+    def test_timeout_capped_by_deadline(self):
+        client = RestClient('localhost', 8080, timeout=(3, 10), deadline=2)
+        client.session = FakeSession()
+        client.do_request('get', '/')
+        connect, read = client.session.timeouts[0]
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+    def test_read_timeout(self):
+        client = RestClient('localhost', 8080, timeout=1)
+        client.session = FakeSession([ReadTimeout()])
+        with self.assertRaises(RequestTimeoutException) as ctx:
+            client.do_request('get', '/')
+        self.assertNotIsInstance(ctx.exception, DeadlineExceededException)
+
+
+class TestDeadline(TestCase):
+    def test_deadline_covers_login_and_retries(self):
+        client = FakeLoginClient()
+        client.session = FakeSession(delays=[0.06])
+        with self.assertRaises(DeadlineExceededException):
+            client.fail_auth()
+        self.assertEqual(client.logins, 2)
+
+    def test_endpoint_deadline(self):
+        client = TimeoutClient('localhost', 8080, deadline=10)
+        client.session = FakeSession(delays=[0.1])
+        with self.assertRaises(DeadlineExceededException):
+            client.slow()
+        self.assertIsNone(client._active_deadline())
+
+    def test_nested_scope_does_not_extend_deadline(self):
+        client = RestClient('localhost', 8080)
+        with client._deadline_scope(1) as outer:
+            with client._deadline_scope(10) as inner:
+                self.assertEqual(inner, outer)
+        self.assertIsNone(client._active_deadline())